@@ -1,5 +1,6 @@
 # Configuration settings for the media renamer
 
+import functools
 import os
 from pathlib import Path
 
@@ -28,11 +29,17 @@ JUNK_SUBTITLES_DIR = JUNK_DIR / 'subtitles'
 JUNK_SUBTITLES_TV_DIR = JUNK_SUBTITLES_DIR / 'TV Shows'
 JUNK_SUBTITLES_MOVIES_DIR = JUNK_SUBTITLES_DIR / 'Movies'
 
-# Create directories if they don't exist
-for directory in [MOVIES_DIR, TV_SHOWS_DIR, MUSIC_DIR, SOFTWARE_DIR, BOOKS_DIR,
-                 JUNK_DIR, JUNK_SUBTITLES_DIR, JUNK_SUBTITLES_TV_DIR, 
-                 JUNK_SUBTITLES_MOVIES_DIR]:
-    directory.mkdir(parents=True, exist_ok=True)
+# Create directories if they don't exist. Deferred to main() rather than
+# run on every import of this module; lru_cache makes repeat calls free.
+@functools.lru_cache(maxsize=1)
+def _ensure_dirs():
+    for directory in [MOVIES_DIR, TV_SHOWS_DIR, MUSIC_DIR, SOFTWARE_DIR, BOOKS_DIR,
+                     JUNK_DIR, JUNK_SUBTITLES_DIR, JUNK_SUBTITLES_TV_DIR,
+                     JUNK_SUBTITLES_MOVIES_DIR]:
+        # os.path.isdir is cheaper than Path.exists and skips the mkdir
+        # syscall for directories that are already in place
+        if not os.path.isdir(directory):
+            directory.mkdir(parents=True, exist_ok=True)
 
 # OpenAI API configuration
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4-0125-preview')  # Get model from env
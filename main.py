@@ -3,16 +3,23 @@ Media file organizer and renamer using OpenAI API.
 Monitors a directory for new files and organizes them based on type and content.
 """
 
+import atexit
+import errno
 import os
+import shutil
+import sys
+import threading
 import time
 import json
+import re
 import subprocess
+import tempfile
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import logging
-from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-import openai
 from dotenv import load_dotenv
 
 import config
@@ -20,24 +27,66 @@ from utils import (
     get_media_type,
     sanitize_filename,
     extract_year,
-    extract_season_episode
+    extract_season_episode,
+    parse_tv
 )
 
-def log_operation(operation_type, source_path, destination_path=None, extra_info=None):
-    """Log file operations to a log file."""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    log_file = Path(config.DEST_BASE_DIR) / 'file_operations.log'
-    
-    log_entry = f"[{timestamp}] {operation_type}:\n"
-    log_entry += f"  Source: {source_path}\n"
-    if destination_path:
-        log_entry += f"  Destination: {destination_path}\n"
-    if extra_info:
-        log_entry += f"  Info: {extra_info}\n"
-    log_entry += "-" * 80 + "\n"
-    
-    with open(log_file, 'a', encoding='utf-8') as f:
-        f.write(log_entry)
+# How many files to analyze per OpenAI request during the startup scan
+ANALYZE_BATCH_SIZE = 20
+
+# Word tokens used to index subtitle stems for candidate lookup
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# In-progress download names that writers rename away when finished
+_TEMP_NAME_RE = re.compile(r'\.(part|tmp|crdownload)$', re.IGNORECASE)
+
+# Keywords that mark bonus material in filenames or parent folders
+_EXTRA_KEYWORDS = [
+    'behind the scenes', 'deleted scene', 'deleted scenes', 'featurette',
+    'interview', 'bloopers', 'gag reel', 'making of', 'extras', 'bonus',
+    'trailer', 'sample', 'promo', 'outtakes'
+]
+
+# Match all extra-content keywords in one pass: an Aho-Corasick automaton
+# when pyahocorasick is installed, else a single compiled alternation
+_EXTRA_AC = None
+_EXTRA_RE = None
+try:
+    import ahocorasick
+    _EXTRA_AC = ahocorasick.Automaton()
+    for _kw in _EXTRA_KEYWORDS:
+        _EXTRA_AC.add_word(_kw, _kw)
+    _EXTRA_AC.make_automaton()
+except ImportError:
+    _EXTRA_RE = re.compile('|'.join(map(re.escape, _EXTRA_KEYWORDS)))
+
+# Optional io_uring-backed copies for cross-filesystem moves on Linux
+pyuring = None
+if sys.platform.startswith('linux'):
+    try:
+        import pyuring
+    except ImportError:
+        pass
+
+def move_file(src, dst):
+    """Move a file or directory, handling cross-filesystem destinations.
+
+    Plain os.rename when source and destination share a filesystem; on
+    EXDEV, batch the copy through io_uring when pyuring is available,
+    otherwise fall back to shutil.move.
+    """
+    src = os.fspath(src)
+    dst = os.fspath(dst)
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        if pyuring is not None and os.path.isfile(src):
+            pyuring.copy(src, dst, mode="fast", qd=32, block_size=1 << 20)
+            os.unlink(src)
+        else:
+            shutil.move(src, dst)
 
 # Configure logging
 logging.basicConfig(
@@ -48,35 +97,210 @@ logging.basicConfig(
 class MediaFileHandler(FileSystemEventHandler):
     def __init__(self):
         super().__init__()
+        # Deferred import - openai is megabytes of Python that the CLI and
+        # cleanup paths never need
+        import openai
         self.client = openai.OpenAI()
         self.prompts = {}
         self.load_prompts()
+        # Bind config values once - hot paths below avoid repeated module
+        # attribute lookups
+        self._src = config.SOURCE_DIR
+        self._dest_base = str(config.DEST_BASE_DIR)
+        self._model = config.OPENAI_MODEL
+        self._movies = config.MOVIES_DIR
+        self._tv = config.TV_SHOWS_DIR
+        self._books = config.BOOKS_DIR
+        self._extras_tv = config.EXTRAS_TV_DIR
+        self._junk = config.JUNK_DIR
+        self._junk_subs = config.JUNK_SUBTITLES_DIR
+        self._junk_subs_tv = config.JUNK_SUBTITLES_TV_DIR
+        self._junk_subs_movies = config.JUNK_SUBTITLES_MOVIES_DIR
+        self._log_path = Path(config.DEST_BASE_DIR) / 'file_operations.log'
+        # Keep one buffered append handle open for the process lifetime
+        # instead of an open/close syscall pair per logged operation
+        self._log_fh = open(self._log_path, 'a', encoding='utf-8', buffering=1 << 16)
+        self._log_lock = threading.Lock()
+        atexit.register(self._close_log)
+        # Per-file analysis cache - re-processing the same tree (e.g. after a
+        # crash) skips the API calls entirely
+        self._analyze_cache_path = Path(config.DEST_BASE_DIR) / '.analyze_cache.json'
+        self._analyze_cache = self._load_json_cache(self._analyze_cache_path)
+        # Guards cache mutation and persistence when the startup scan runs
+        # process_file from a thread pool
+        self._cache_lock = threading.Lock()
+        # Flush on any interpreter exit, not just the Ctrl-C path
+        atexit.register(self.save_caches)
+        # Global subtitle index: all known .srt files under the source tree,
+        # plus an inverted token index over their stems for candidate lookup.
+        # Replaces a per-video recursive rglob with a single startup scan.
+        # The lock keeps pool workers from iterating the sets mid-mutation
+        # or claiming the same subtitle twice (reentrant so claiming can
+        # call the discard helper)
+        self._srt_files = set()
+        self._srt_index = defaultdict(set)
+        self._srt_lock = threading.RLock()
+        # Debounce for the event stream: writers that create a file in
+        # several syscalls fire a burst of events for the same path
+        self._recent = OrderedDict()
+        self._debounce = 2.0
+        self._recent_max = 1024
+
+    def add_subtitle(self, srt_file):
+        """Add a subtitle file to the lookup index."""
+        with self._srt_lock:
+            self._srt_files.add(srt_file)
+            for token in _TOKEN_RE.findall(srt_file.stem.lower()):
+                self._srt_index[token].add(srt_file)
+
+    def _discard_subtitle(self, srt_file):
+        """Remove a consumed or moved subtitle file from the index."""
+        with self._srt_lock:
+            self._srt_files.discard(srt_file)
+            for token in _TOKEN_RE.findall(srt_file.stem.lower()):
+                self._srt_index[token].discard(srt_file)
+
+    @staticmethod
+    def _load_json_cache(cache_path):
+        """Load a JSON cache file, returning an empty dict if missing or corrupt."""
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save_json_cache(cache_path, cache):
+        """Write a JSON cache file, ignoring errors on shutdown paths."""
+        try:
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+        except OSError as e:
+            logging.error(f"Error saving cache {cache_path}: {str(e)}")
+
+    def save_caches(self):
+        """Flush persistent caches to disk."""
+        with self._cache_lock:
+            self._save_json_cache(self._analyze_cache_path, self._analyze_cache)
+
+    def log_operation(self, operation_type, source_path, destination_path=None, extra_info=None):
+        """Log file operations to a log file."""
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        log_entry = f"[{timestamp}] {operation_type}:\n"
+        log_entry += f"  Source: {source_path}\n"
+        if destination_path:
+            log_entry += f"  Destination: {destination_path}\n"
+        if extra_info:
+            log_entry += f"  Info: {extra_info}\n"
+        log_entry += "-" * 80 + "\n"
+
+        with self._log_lock:
+            self._log_fh.write(log_entry)
+
+    def _close_log(self):
+        """Flush and close the operations log handle."""
+        with self._log_lock:
+            if not self._log_fh.closed:
+                self._log_fh.close()
 
     def on_created(self, event):
         if event.is_directory:
             return
-        self.process_file(Path(event.src_path))
+        self._handle_file_event(event.src_path)
+
+    def on_moved(self, event):
+        # Writers that download to a temp name finish with a rename, which
+        # watchdog reports as a move - treat the destination as a new file
+        if event.is_directory:
+            return
+        self._handle_file_event(event.dest_path)
+
+    def _handle_file_event(self, path_str):
+        """Debounce and dispatch a created or moved-in file path."""
+        # Skip in-progress download names; the finishing rename arrives as
+        # a move event for the final name
+        if _TEMP_NAME_RE.search(path_str):
+            return
+        # Collapse event storms for the same path into one processing pass
+        now = time.monotonic()
+        if now - self._recent.get(path_str, 0.0) < self._debounce:
+            return
+        self._recent[path_str] = now
+        self._recent.move_to_end(path_str)
+        while len(self._recent) > self._recent_max:
+            self._recent.popitem(last=False)
+
+        file_path = Path(path_str)
+        if file_path.suffix.lower() == '.srt':
+            # Leave subtitles in place for their video to claim; the
+            # periodic cleanup sweeps any that are never matched
+            self.add_subtitle(file_path)
+            return
+        self.process_file(file_path)
 
     def load_prompts(self):
-        """Load all prompt files from the prompts directory."""
+        """Load all prompt files from the prompts directory.
+
+        The prompts are pre-concatenated into prompts/.compiled.json and
+        that single file is reused while it is at least as new as every
+        source .txt, so steady-state startup does one read instead of one
+        per prompt.
+        """
         prompts_dir = Path(__file__).parent / 'prompts'
-        for prompt_file in prompts_dir.glob('*.txt'):
+        compiled = prompts_dir / '.compiled.json'
+        prompt_files = list(prompts_dir.glob('*.txt'))
+
+        try:
+            compiled_mtime = os.path.getmtime(compiled)
+        except OSError:
+            compiled_mtime = -1.0
+        if prompt_files and compiled_mtime >= max(os.path.getmtime(p) for p in prompt_files):
+            try:
+                with open(compiled, 'r', encoding='utf-8') as f:
+                    self.prompts = json.load(f)
+                return
+            except (OSError, ValueError):
+                pass  # stale or corrupt cache - rebuild below
+
+        for prompt_file in prompt_files:
             prompt_name = prompt_file.stem
             with open(prompt_file, 'r') as f:
                 self.prompts[prompt_name] = f.read()
 
+        # Regenerate the compiled cache atomically
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=prompts_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.prompts, f)
+            os.replace(tmp_path, compiled)
+        except OSError as e:
+            logging.error(f"Error writing compiled prompts cache: {str(e)}")
+
+    def _parent_folders(self, file_path):
+        """Join the path components between the source root and the file."""
+        return '/'.join(file_path.relative_to(self._src).parent.parts)
+
     def analyze_franchise(self, movie_title, year):
         """Analyze if a movie belongs to a franchise."""
         pass  # Franchise analysis removed
 
     def is_extra_content(self, filename, parent_folders):
-        """Check if the file is likely extra content."""
-        pass  # Extra content analysis removed
+        """Check if the file is likely extra content.
+
+        Every keyword is matched in a single scan over the text instead of
+        one substring search per keyword.
+        """
+        search_text = f"{parent_folders}/{filename}".lower()
+        if _EXTRA_AC is not None:
+            return next(_EXTRA_AC.iter(search_text), None) is not None
+        return _EXTRA_RE.search(search_text) is not None
 
-    def analyze_book(self, file_path, is_audiobook=False):
+    def analyze_book(self, file_path, is_audiobook=False, parent_folders=None):
         """Analyze book or audiobook files using OpenAI API."""
         try:
-            parent_folders = '/'.join(file_path.relative_to(config.SOURCE_DIR).parent.parts)
+            if parent_folders is None:
+                parent_folders = self._parent_folders(file_path)
             
             messages = [
                 {"role": "system", "content": self.prompts['book_analysis_prompt']},
@@ -87,7 +311,7 @@ class MediaFileHandler(FileSystemEventHandler):
             ]
 
             response = self.client.chat.completions.create(
-                model=config.OPENAI_MODEL,
+                model=self._model,
                 messages=messages,
                 temperature=0.3,
                 max_tokens=250,
@@ -104,7 +328,7 @@ class MediaFileHandler(FileSystemEventHandler):
                 
                 # Add format prefix for audiobooks
                 format_prefix = "[Audiobook] " if is_audiobook else ""
-                book_dir = config.BOOKS_DIR / f"{format_prefix}{sanitize_filename(result['title'])}{author_text}"
+                book_dir = self._books / f"{format_prefix}{sanitize_filename(result['title'])}{author_text}"
             else:
                 # For series
                 series_name = result.get('series_name', 'Unknown Series')
@@ -112,7 +336,7 @@ class MediaFileHandler(FileSystemEventHandler):
                 
                 # Create format-specific subdirectories within series
                 format_dir = "Audiobooks" if is_audiobook else "Ebooks"
-                series_dir = config.BOOKS_DIR / sanitize_filename(series_name) / format_dir
+                series_dir = self._books / sanitize_filename(series_name) / format_dir
                 
                 number_prefix = f"{str(series_num).zfill(2)} - " if series_num else ""
                 book_dir = series_dir / f"{sanitize_filename(number_prefix + result['title'])}"
@@ -131,16 +355,36 @@ class MediaFileHandler(FileSystemEventHandler):
             return None
 
     def analyze_file(self, file_path, media_type):
-        """Analyze file using OpenAI API to get proper naming and metadata."""
+        """Analyze file using OpenAI API to get proper naming and metadata.
+
+        Results are cached by (media_type, filename, parent folders) in a
+        cache persisted under the destination directory, so re-runs over the
+        same tree never repeat an API call.
+        """
+        parent_folders = self._parent_folders(file_path)
+        cache_key = f"{media_type}|{file_path.name}|{parent_folders}"
+        cached = self._analyze_cache.get(cache_key)
+        if cached is not None:
+            file_info = dict(cached)
+            file_info['directory'] = Path(file_info['directory'])
+            return file_info
+
+        file_info = self._analyze_file_uncached(file_path, media_type, parent_folders)
+        if file_info:
+            entry = dict(file_info)
+            entry['directory'] = str(entry['directory'])
+            with self._cache_lock:
+                self._analyze_cache[cache_key] = entry
+        return file_info
+
+    def _analyze_file_uncached(self, file_path, media_type, parent_folders):
+        """Run the actual OpenAI analysis for analyze_file."""
         try:
             if media_type == 'book':
-                return self.analyze_book(file_path, is_audiobook=False)
+                return self.analyze_book(file_path, is_audiobook=False, parent_folders=parent_folders)
             elif media_type == 'audiobook':
-                return self.analyze_book(file_path, is_audiobook=True)
-                
-            # Include parent folder names for better context
-            parent_folders = '/'.join(file_path.relative_to(config.SOURCE_DIR).parent.parts)
-            
+                return self.analyze_book(file_path, is_audiobook=True, parent_folders=parent_folders)
+
             # Check if it's likely extra content
             is_extra = self.is_extra_content(file_path.name, parent_folders)
             
@@ -171,7 +415,7 @@ class MediaFileHandler(FileSystemEventHandler):
 
             # Call OpenAI API
             response = self.client.chat.completions.create(
-                model=config.OPENAI_MODEL,
+                model=self._model,
                 messages=messages,
                 temperature=0.3,
                 max_tokens=250,
@@ -180,106 +424,238 @@ class MediaFileHandler(FileSystemEventHandler):
 
             # Parse the response
             result = json.loads(response.choices[0].message.content)
-            
-            if media_type == 'tv_show':
-                season_num = str(result.get('season_number', '01')).zfill(2)
-                episode_num = str(result.get('episode_number', '01')).zfill(2)
-                show_name = result.get('show_name', 'Unknown Show')
-                episode_title = result.get('episode_title', '')
-                is_extra = result.get('is_extra', False)
-                
-                if is_extra:
-                    # Create path for TV show extras
-                    base_dir = Path(config.EXTRAS_TV_DIR) / sanitize_filename(show_name)
-                    if season_num != '00':
-                        base_dir = base_dir / f"Season {season_num}"
-                    extra_type = result.get('extra_type', 'Bonus Content')
-                    new_filename = f"{show_name} - S{season_num}E{episode_num} - {extra_type} - {episode_title or 'Special'}{file_path.suffix}"
-                else:
-                    # Regular TV show episode
-                    base_dir = Path(config.TV_SHOWS_DIR) / sanitize_filename(show_name) / f"Season {season_num}"
-                    new_filename = f"{show_name} - S{season_num}E{episode_num}{' - ' + episode_title if episode_title else ''}{file_path.suffix}"
-                
-                return {
-                    'filename': sanitize_filename(new_filename),
-                    'directory': base_dir,
-                    'show_name': show_name,
-                    'is_extra': is_extra
-                }
-            
-            elif media_type == 'movie':
-                movie_title = result.get('movie_title', 'Unknown Movie')
-                year = result.get('year', '')
-                is_extra = result.get('is_extra', False)
-                
-                if is_extra:
-                    # Handle movie extras
-                    related_title = result.get('related_title', movie_title)
-                    extra_type = result.get('extra_type', 'Bonus Content')
-                    
-                    base_dir = config.MOVIES_DIR  # All movies in a single directory
-                    
-                    new_filename = f"{related_title} ({year}) - {extra_type}{file_path.suffix}"
-                else:
-                    # Regular movie
-                    base_dir = config.MOVIES_DIR
-                    
-                    new_filename = f"{movie_title} ({year}){file_path.suffix}" if year else f"{movie_title}{file_path.suffix}"
-                
-                return {
-                    'filename': sanitize_filename(new_filename),
-                    'directory': base_dir,
-                    'title': movie_title,
-                    'is_extra': is_extra
-                }
-            
-            return None
+            return self._file_info_from_result(result, media_type, file_path.suffix)
 
         except Exception as e:
             logging.error(f"Error analyzing file: {str(e)}")
             return None
 
+    def prefetch_analysis(self, file_paths):
+        """Batch-analyze files ahead of processing to cut API round trips.
+
+        Groups uncached video files by media type and submits them in chunks
+        of ANALYZE_BATCH_SIZE per chat completion, filling the analysis cache
+        that analyze_file consults. One request covers many files instead of
+        one request per file during the startup scan.
+        """
+        pending = {'tv_show': [], 'movie': []}
+        for file_path in file_paths:
+            file_path = Path(file_path)
+            media_type, season, episode = get_media_type(file_path, file_path.name)
+            if media_type not in pending:
+                continue
+            parent_folders = self._parent_folders(file_path)
+            cache_key = f"{media_type}|{file_path.name}|{parent_folders}"
+            if cache_key not in self._analyze_cache:
+                pending[media_type].append((file_path, parent_folders, cache_key))
+
+        for media_type, entries in pending.items():
+            for start in range(0, len(entries), ANALYZE_BATCH_SIZE):
+                self._analyze_batch(media_type, entries[start:start + ANALYZE_BATCH_SIZE])
+
+    def _analyze_batch(self, media_type, entries):
+        """Analyze a chunk of same-type files in a single OpenAI request."""
+        try:
+            # The index is the only match key echoed back - filenames alone
+            # collide across folders (ShowA/S01E01.mkv vs ShowB/S01E01.mkv)
+            files_payload = [
+                {
+                    'index': idx,
+                    'filename': file_path.name,
+                    'parent_folders': parent_folders,
+                    'is_extra_content': self.is_extra_content(file_path.name, parent_folders)
+                }
+                for idx, (file_path, parent_folders, cache_key) in enumerate(entries)
+            ]
+
+            messages = [
+                {"role": "system", "content": self.prompts['file_analysis_prompt']},
+                {"role": "user", "content": f"""Please analyze each of these file paths and respond in JSON format
+                as {{"results": [...]}} with one entry per input file, echoing back the original "index".
+                Media type for all files: {media_type}
+
+                For TV Shows, include per entry:
+                - index (echoed from input)
+                - show_name
+                - season_number
+                - episode_number
+                - episode_title
+                - is_extra (true/false)
+                - extra_type (if applicable: behind the scenes, deleted scenes, etc.)
+
+                For Movies, include per entry:
+                - index (echoed from input)
+                - movie_title
+                - year
+                - is_extra (true/false)
+                - extra_type (if applicable)
+                - related_title (main movie/show this extra belongs to)
+
+                Files:
+                {json.dumps(files_payload, indent=2)}"""}
+            ]
+
+            response = self.client.chat.completions.create(
+                model=self._model,
+                messages=messages,
+                temperature=0.3,
+                # gpt-4 models cap completions at 4096 tokens; asking for
+                # more gets the whole request rejected
+                max_tokens=min(4096, 250 * len(entries)),
+                response_format={ "type": "json_object" }
+            )
+
+            results = json.loads(response.choices[0].message.content).get('results', [])
+            # Keep only unambiguous echoes: a valid index that appears once.
+            # Anything else is dropped so the per-file fallback in
+            # analyze_file picks it up instead of mis-filing a neighbour
+            by_index = {}
+            for r in results:
+                if not isinstance(r, dict):
+                    continue
+                idx = r.get('index')
+                if isinstance(idx, int) and 0 <= idx < len(entries):
+                    by_index[idx] = None if idx in by_index else r
+
+            for idx, (file_path, parent_folders, cache_key) in enumerate(entries):
+                result = by_index.get(idx)
+                if not result:
+                    continue
+                file_info = self._file_info_from_result(result, media_type, file_path.suffix)
+                if file_info:
+                    entry = dict(file_info)
+                    entry['directory'] = str(entry['directory'])
+                    with self._cache_lock:
+                        self._analyze_cache[cache_key] = entry
+
+        except Exception as e:
+            logging.error(f"Error batch-analyzing {len(entries)} files: {str(e)}")
+
+    def _file_info_from_result(self, result, media_type, suffix):
+        """Build the destination file info from a parsed OpenAI result."""
+        if media_type == 'tv_show':
+            season_num = str(result.get('season_number', '01')).zfill(2)
+            episode_num = str(result.get('episode_number', '01')).zfill(2)
+            show_name = result.get('show_name', 'Unknown Show')
+            episode_title = result.get('episode_title', '')
+            is_extra = result.get('is_extra', False)
+
+            if is_extra:
+                # Create path for TV show extras
+                base_dir = Path(self._extras_tv) / sanitize_filename(show_name)
+                if season_num != '00':
+                    base_dir = base_dir / f"Season {season_num}"
+                extra_type = result.get('extra_type', 'Bonus Content')
+                new_filename = f"{show_name} - S{season_num}E{episode_num} - {extra_type} - {episode_title or 'Special'}{suffix}"
+            else:
+                # Regular TV show episode
+                base_dir = Path(self._tv) / sanitize_filename(show_name) / f"Season {season_num}"
+                new_filename = f"{show_name} - S{season_num}E{episode_num}{' - ' + episode_title if episode_title else ''}{suffix}"
+
+            return {
+                'filename': sanitize_filename(new_filename),
+                'directory': base_dir,
+                'show_name': show_name,
+                'is_extra': is_extra
+            }
+
+        elif media_type == 'movie':
+            movie_title = result.get('movie_title', 'Unknown Movie')
+            year = result.get('year', '')
+            is_extra = result.get('is_extra', False)
+
+            if is_extra:
+                # Handle movie extras
+                related_title = result.get('related_title', movie_title)
+                extra_type = result.get('extra_type', 'Bonus Content')
+
+                base_dir = self._movies  # All movies in a single directory
+
+                new_filename = f"{related_title} ({year}) - {extra_type}{suffix}"
+            else:
+                # Regular movie
+                base_dir = self._movies
+
+                new_filename = f"{movie_title} ({year}){suffix}" if year else f"{movie_title}{suffix}"
+
+            return {
+                'filename': sanitize_filename(new_filename),
+                'directory': base_dir,
+                'title': movie_title,
+                'is_extra': is_extra
+            }
+
+        return None
+
+    def _classify_sub(self, sub):
+        """Pick a junk destination for an unmatched subtitle.
+
+        Subtitles are almost always named like their videos, so a local
+        season/episode or year parse replaces the two OpenAI calls this
+        used to cost per stray .srt. Set NAMER_SUB_LLM=1 to fall back to
+        the API analysis when both heuristics come up empty.
+        """
+        season, episode = parse_tv(sub.name)
+        if season is not None:
+            return Path(self._junk_subs_tv) / f"Season {str(season).zfill(2)}" / sub.name
+        if extract_year(sub.name):
+            return Path(self._junk_subs_movies) / sub.name
+
+        if os.getenv('NAMER_SUB_LLM') == '1':
+            sub_info = self.analyze_file(sub, 'tv_show')  # Try TV show first
+            if sub_info and 'show_name' in sub_info:
+                dest_dir = Path(self._junk_subs_tv) / sanitize_filename(sub_info['show_name'])
+                return dest_dir / Path(sub_info['filename']).with_suffix('.srt').name
+            sub_info = self.analyze_file(sub, 'movie')
+            if sub_info and 'title' in sub_info:
+                return Path(self._junk_subs_movies) / Path(sub_info['filename']).with_suffix('.srt').name
+
+        # Couldn't identify, put in root of subtitles dir
+        return Path(self._junk_subs) / sub.name
+
     def find_and_process_subtitles(self, video_path, new_video_path, file_info):
         """Find and embed subtitle files for the video."""
         try:
             video_dir = video_path.parent
             video_name = video_path.stem
+            video_name_lower = video_name.lower()
+
+            # Snapshot the index and claim this video's subtitles in one
+            # locked section so concurrent workers neither iterate a
+            # mutating set nor grab the same subtitle twice
             found_subs = []
             unmatched_subs = []
-            
-            # Search for subtitle files in the same directory and subdirectories
-            for srt_file in video_dir.rglob('*.srt'):
-                # Check if this subtitle might belong to our video
-                if (video_name.lower() in srt_file.stem.lower() or
-                    srt_file.stem.lower() in video_name.lower()):
-                    found_subs.append(srt_file)
-                else:
-                    unmatched_subs.append(srt_file)
+            with self._srt_lock:
+                # All indexed subtitles under the video's directory tree
+                subs_in_tree = sorted(
+                    srt_file for srt_file in self._srt_files
+                    if video_dir in srt_file.parents
+                )
+
+                # Candidate matches via the token index, narrowed to this tree
+                candidates = set()
+                for token in _TOKEN_RE.findall(video_name_lower):
+                    candidates |= self._srt_index.get(token, set())
+
+                for srt_file in subs_in_tree:
+                    # Check if this subtitle might belong to our video
+                    if (srt_file in candidates and
+                        (video_name_lower in srt_file.stem.lower() or
+                         srt_file.stem.lower() in video_name_lower)):
+                        found_subs.append(srt_file)
+                    else:
+                        unmatched_subs.append(srt_file)
+                    self._discard_subtitle(srt_file)
                     
             # Process unmatched subtitles
             for sub in unmatched_subs:
                 try:
-                    # Analyze subtitle file to determine if it's for a TV show or movie
-                    sub_info = self.analyze_file(sub, 'tv_show')  # Try TV show first
-                    if sub_info and 'show_name' in sub_info:
-                        # It's a TV show subtitle
-                        dest_dir = Path(config.JUNK_SUBTITLES_TV_DIR) / sanitize_filename(sub_info['show_name']) / f"Season {sub_info['season_num']}"
-                        dest_dir.mkdir(parents=True, exist_ok=True)
-                        new_sub_path = dest_dir / sub_info['filename'].replace(sub_info['filename'].suffix, '.srt')
-                    else:
-                        # Try as movie or move to general subtitles
-                        sub_info = self.analyze_file(sub, 'movie')
-                        if sub_info and 'title' in sub_info:
-                            dest_dir = Path(config.JUNK_SUBTITLES_MOVIES_DIR)
-                            dest_dir.mkdir(parents=True, exist_ok=True)
-                            new_sub_path = dest_dir / f"{sub_info['filename'].replace(sub_info['filename'].suffix, '.srt')}"
-                        else:
-                            # Couldn't identify, put in root of subtitles dir
-                            new_sub_path = Path(config.JUNK_SUBTITLES_DIR) / sub.name
-                    
+                    new_sub_path = self._classify_sub(sub)
+                    new_sub_path.parent.mkdir(parents=True, exist_ok=True)
+
                     # Move the subtitle file
-                    sub.rename(new_sub_path)
-                    log_operation("MOVE_SUBTITLE", str(sub), str(new_sub_path), "Unmatched subtitle moved to junk")
+                    move_file(sub, new_sub_path)
+                    self.log_operation("MOVE_SUBTITLE", str(sub), str(new_sub_path), "Unmatched subtitle moved to junk")
                 except Exception as e:
                     logging.error(f"Error processing unmatched subtitle {sub}: {str(e)}")
             
@@ -289,27 +665,16 @@ class MediaFileHandler(FileSystemEventHandler):
             # Create a temporary file for the video with embedded subtitles
             temp_output = new_video_path.parent / f"temp_{new_video_path.name}"
             
-            # Prepare ffmpeg command for subtitle embedding
-            subtitle_maps = []
-            subtitle_metadata = []
-            
-            for idx, sub in enumerate(found_subs, 1):
-                subtitle_maps.extend(['-i', str(sub)])
-                subtitle_metadata.extend([
-                    f'-map {idx}:s',
-                    f'-metadata:s:s:{idx-1} language=eng',
-                    f'-metadata:s:s:{idx-1} title="Subtitle {idx}"'
-                ])
-            
-            # Build the complete ffmpeg command
-            cmd = [
-                'ffmpeg', '-i', str(new_video_path),
-                *[item for pair in zip(['-i'] * len(found_subs), map(str, found_subs)) for item in pair],
-                '-map', '0:v', '-map', '0:a',
-                *[f'-map {i}:s' for i in range(1, len(found_subs) + 1)],
-                '-c:v', 'copy', '-c:a', 'copy', '-c:s', 'mov_text',
-                str(temp_output)
-            ]
+            # Build the ffmpeg command in a single pass
+            cmd = ['ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error',
+                   '-i', str(new_video_path)]
+            for sub in found_subs:
+                cmd += ['-i', str(sub)]
+            cmd += ['-map', '0:v', '-map', '0:a']
+            for idx in range(1, len(found_subs) + 1):
+                cmd += ['-map', f'{idx}:s', f'-metadata:s:s:{idx-1}', 'language=eng']
+            cmd += ['-c:v', 'copy', '-c:a', 'copy', '-c:s', 'mov_text',
+                    str(temp_output)]
             
             # Execute ffmpeg command
             logging.info(f"Embedding {len(found_subs)} subtitle(s) into video...")
@@ -320,13 +685,13 @@ class MediaFileHandler(FileSystemEventHandler):
             
             # Log the subtitle embedding
             sub_info = f"Embedded {len(found_subs)} subtitle(s): {', '.join(s.name for s in found_subs)}"
-            log_operation("SUBTITLE_EMBED", str(video_path), str(new_video_path), sub_info)
+            self.log_operation("SUBTITLE_EMBED", str(video_path), str(new_video_path), sub_info)
             
             # Delete the processed subtitle files
             for sub in found_subs:
                 try:
                     sub.unlink()
-                    log_operation("DELETE_SUBTITLE", str(sub), extra_info="Subtitle embedded and file removed")
+                    self.log_operation("DELETE_SUBTITLE", str(sub), extra_info="Subtitle embedded and file removed")
                 except Exception as e:
                     logging.error(f"Error deleting subtitle file {sub}: {str(e)}")
                     
@@ -334,22 +699,26 @@ class MediaFileHandler(FileSystemEventHandler):
             logging.error(f"Error processing subtitles for {video_path}: {str(e)}")
 
     def process_file(self, file_path):
-        """Process a media file and organize it."""
+        """Process a media file and organize it. Accepts a str or Path."""
         try:
-            # Check if file still exists and is not in the destination directory
-            if not file_path.exists() or str(file_path).startswith(str(config.DEST_BASE_DIR)):
+            # Check if file still exists and is not in the destination
+            # directory - plain string/os.path checks before paying for a
+            # Path object
+            path_str = os.fspath(file_path)
+            if path_str.startswith(self._dest_base) or not os.path.isfile(path_str):
                 return
+            file_path = Path(path_str)
 
             logging.info(f"Processing new file: {file_path}")
             
-            media_type = get_media_type(file_path, file_path.name)
+            media_type, season, episode = get_media_type(file_path, file_path.name)
             
             if media_type == 'unknown':
                 # Move to junk directory
-                junk_path = config.JUNK_DIR / file_path.name
-                file_path.rename(junk_path)
+                junk_path = self._junk / file_path.name
+                move_file(file_path, junk_path)
                 logging.warning(f"Unknown media type, moved to junk: {file_path}")
-                log_operation("MOVE_TO_JUNK", str(file_path), str(junk_path), "Unknown media type")
+                self.log_operation("MOVE_TO_JUNK", str(file_path), str(junk_path), "Unknown media type")
                 return
 
             # Generate new filename and metadata using OpenAI
@@ -365,12 +734,12 @@ class MediaFileHandler(FileSystemEventHandler):
             new_path = file_info['directory'] / file_info['filename']
             
             # Move the file
-            file_path.rename(new_path)
+            move_file(file_path, new_path)
             logging.info(f"Successfully moved and renamed file to: {new_path}")
-            log_operation("MOVE", str(file_path), str(new_path))
+            self.log_operation("MOVE", str(file_path), str(new_path))
 
             # If it's a video file, find and process subtitles
-            if file_info['directory'] == config.TV_SHOWS_DIR or file_info['directory'] == config.MOVIES_DIR:
+            if file_info['directory'] == self._tv or file_info['directory'] == self._movies:
                 self.find_and_process_subtitles(file_path, new_path, file_info)
 
         except Exception as e:
@@ -387,7 +756,7 @@ class MediaFileHandler(FileSystemEventHandler):
 
             # Call OpenAI API
             response = self.client.chat.completions.create(
-                model=config.OPENAI_MODEL,
+                model=self._model,
                 messages=messages,
                 temperature=0.3,
                 max_tokens=150
@@ -416,35 +785,50 @@ class MediaFileHandler(FileSystemEventHandler):
             'software': config.SOFTWARE_DIR
         }.get(media_type)
 
-def cleanup_source_directory(source_dir):
+def walk_files(path):
+    """Yield every file path (as str) under path using os.scandir.
+
+    DirEntry caches the file type from the dirent, so this avoids the
+    per-entry stat calls and Path allocations of Path.rglob.
+    """
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.path
+
+def cleanup_source_directory(source_dir, handler):
     """Move all remaining files and directories to junk folder."""
-    source_path = Path(source_dir)
-    
     # Skip if source directory doesn't exist
-    if not source_path.exists():
+    if not os.path.isdir(source_dir):
         return
-        
+
     logging.info("Cleaning up source directory...")
-    
-    # Process all remaining items
-    for item in source_path.iterdir():
+
+    junk_dir = str(config.JUNK_DIR)
+    # Snapshot the entries first - DirEntry caches the file type, and we
+    # stay on plain strings so each move is a single os.rename
+    with os.scandir(source_dir) as it:
+        entries = list(it)
+    for entry in entries:
         try:
-            if item.is_file():
+            if entry.is_file():
                 # Move file to junk
-                dest_path = config.JUNK_DIR / item.name
-                item.rename(dest_path)
-                log_operation("CLEANUP_MOVE", str(item), str(dest_path), "Remaining file moved to junk")
-            elif item.is_dir():
+                dest_path = os.path.join(junk_dir, entry.name)
+                move_file(entry.path, dest_path)
+                handler.log_operation("CLEANUP_MOVE", entry.path, dest_path, "Remaining file moved to junk")
+            elif entry.is_dir():
                 # Move entire directory to junk
-                dest_path = config.JUNK_DIR / item.name
+                dest_path = os.path.join(junk_dir, entry.name)
                 # Ensure we don't have naming conflicts
-                if dest_path.exists():
-                    dest_path = config.JUNK_DIR / f"{item.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                item.rename(dest_path)
-                log_operation("CLEANUP_MOVE", str(item), str(dest_path), "Remaining directory moved to junk")
+                if os.path.exists(dest_path):
+                    dest_path = os.path.join(junk_dir, f"{entry.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+                move_file(entry.path, dest_path)
+                handler.log_operation("CLEANUP_MOVE", entry.path, dest_path, "Remaining directory moved to junk")
         except Exception as e:
-            logging.error(f"Error moving item {item} to junk: {str(e)}")
-            
+            logging.error(f"Error moving item {entry.path} to junk: {str(e)}")
+
     logging.info("Source directory cleanup completed")
 
 def main():
@@ -458,21 +842,42 @@ def main():
     if not os.path.exists(config.SOURCE_DIR):
         raise ValueError(f"Source directory does not exist: {config.SOURCE_DIR}")
 
+    # Make sure the destination tree exists before anything writes to it
+    config._ensure_dirs()
+
     # Create event handler and observer
     event_handler = MediaFileHandler()
     
     # Process any existing files in the source directory and its subdirectories
     logging.info("Recursively checking for existing files in source directory...")
-    source_path = Path(config.SOURCE_DIR)
-    for file_path in source_path.rglob('*'):
-        if file_path.is_file():
-            logging.info(f"Processing existing file: {file_path}")
-            event_handler.process_file(file_path)
-    
+    existing_files = []
+    for path_str in walk_files(config.SOURCE_DIR):
+        if path_str.lower().endswith('.srt'):
+            # Index subtitles up front so videos can claim them without
+            # re-walking the tree; leftovers go to junk during cleanup
+            event_handler.add_subtitle(Path(path_str))
+        else:
+            existing_files.append(path_str)
+
+    # Analyze in batches first so the per-file pass hits the cache, and
+    # persist right away so a later crash doesn't repeat the API calls
+    event_handler.prefetch_analysis(existing_files)
+    event_handler.save_caches()
+
+    # Process concurrently - each file blocks on OpenAI/disk I/O, so a
+    # modest pool pipelines the work up to the API rate limit
+    workers = int(os.getenv('NAMER_CONCURRENCY', '16'))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(event_handler.process_file, existing_files):
+            pass
+    event_handler.save_caches()
+
     # Clean up any remaining files and directories
-    cleanup_source_directory(config.SOURCE_DIR)
+    cleanup_source_directory(config.SOURCE_DIR, event_handler)
     
-    # Set up the observer for new files
+    # Set up the observer for new files (imported here to keep module
+    # import light; only the monitoring path needs it)
+    from watchdog.observers import Observer
     observer = Observer()
     observer.schedule(event_handler, config.SOURCE_DIR, recursive=True)
     
@@ -487,12 +892,13 @@ def main():
             cleanup_timer += 1
             # Clean up source directory every 5 minutes
             if cleanup_timer >= 300:  # 300 seconds = 5 minutes
-                cleanup_source_directory(config.SOURCE_DIR)
+                cleanup_source_directory(config.SOURCE_DIR, event_handler)
                 cleanup_timer = 0
     except KeyboardInterrupt:
         observer.stop()
         # Do one final cleanup before stopping
-        cleanup_source_directory(config.SOURCE_DIR)
+        cleanup_source_directory(config.SOURCE_DIR, event_handler)
+        event_handler.save_caches()
         logging.info("Stopping directory monitoring")
     
     observer.join()
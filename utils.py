@@ -5,13 +5,37 @@ Utility functions for media file organization and renaming.
 import os
 import re
 from pathlib import Path
-import magic
 import config
 
+# Precompiled patterns - avoids re-hashing pattern strings on every call
+_YEAR_RE = re.compile(r'\((\d{4})\)')
+# Single alternation covering all season/episode styles so the filename
+# is scanned once instead of once per pattern
+_TV_COMBINED = re.compile(
+    r'(?:S(?P<s1>\d{1,2})E(?P<e1>\d{1,2}))'          # S01E01
+    r'|(?:(?P<s2>\d{1,2})x(?P<e2>\d{1,2}))'          # 1x01
+    r'|(?:Season\s*(?P<s3>\d{1,2})\s*Episode\s*(?P<e3>\d{1,2}))',  # Season 1 Episode 1
+    re.IGNORECASE
+)
+_SANI_INVALID = re.compile(r'[<>:"/\\|?*]')
+_SANI_UNDERSCORE = re.compile(r'_+')
+_SANI_SPACE = re.compile(r'\s+')
+
+# Shared libmagic instance - constructing magic.Magic loads the whole
+# libmagic database, so do it once instead of per file
+_MIME = None
+
+def _get_magic():
+    global _MIME
+    if _MIME is None:
+        # Deferred import - only files with unknown extensions need libmagic
+        import magic
+        _MIME = magic.Magic(mime=True)
+    return _MIME
+
 def get_file_type(file_path):
     """Determine the type of media file using magic numbers."""
-    mime = magic.Magic(mime=True)
-    file_type = mime.from_file(str(file_path))
+    file_type = _get_magic().from_file(str(file_path))
     
     if file_type.startswith('video/'):
         return 'video'
@@ -24,63 +48,76 @@ def get_file_type(file_path):
 def sanitize_filename(filename):
     """Remove or replace special characters that could cause filesystem issues."""
     # Remove invalid characters entirely
-    sanitized = re.sub(r'[<>:"/\\|?*]', '', filename)
+    sanitized = _SANI_INVALID.sub('', filename)
     # Remove unnecessary underscores
-    sanitized = re.sub(r'_+', '_', sanitized)
+    sanitized = _SANI_UNDERSCORE.sub('_', sanitized)
     # Remove leading and trailing underscores
     sanitized = sanitized.strip('_')
     # Remove multiple spaces
-    sanitized = re.sub(r'\s+', ' ', sanitized)
+    sanitized = _SANI_SPACE.sub(' ', sanitized)
     return sanitized.strip()
 
 def extract_year(filename):
     """Extract year from filename if present."""
-    year_match = re.search(r'\((\d{4})\)', filename)
+    year_match = _YEAR_RE.search(filename)
     if year_match:
         return year_match.group(1)
     return None
 
+def parse_tv(filename):
+    """Parse season and episode numbers from filename in a single pass."""
+    match = _TV_COMBINED.search(filename)
+    if match:
+        season, episode = next(
+            (s, e) for s, e in [('s1', 'e1'), ('s2', 'e2'), ('s3', 'e3')]
+            if match.group(s) is not None
+        )
+        return int(match.group(season)), int(match.group(episode))
+    return None, None
+
 def extract_season_episode(filename):
     """Extract season and episode numbers from filename."""
-    # Common patterns for season/episode matching
-    patterns = [
-        r'S(\d{1,2})E(\d{1,2})',  # S01E01
-        r'(\d{1,2})x(\d{1,2})',    # 1x01
-        r'Season\s*(\d{1,2})\s*Episode\s*(\d{1,2})'  # Season 1 Episode 1
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, filename, re.IGNORECASE)
-        if match:
-            season = int(match.group(1))
-            episode = int(match.group(2))
-            return season, episode
-    
-    return None, None
+    return parse_tv(filename)
 
 def is_tv_show(filename):
     """Determine if the file is likely a TV show episode."""
-    patterns = [
-        r'S\d{1,2}E\d{1,2}',
-        r'\d{1,2}x\d{1,2}',
-        r'Season\s*\d{1,2}\s*Episode\s*\d{1,2}'
-    ]
-    return any(re.search(pattern, filename, re.IGNORECASE) for pattern in patterns)
+    return parse_tv(filename)[0] is not None
 
 def get_media_type(file_path, filename):
-    """Determine if the file is a movie, TV show, music, book, or software."""
-    file_type = get_file_type(file_path)
+    """Determine the media type of the file.
+
+    Returns a (media_type, season, episode) tuple so callers can reuse the
+    season/episode parse without re-scanning the filename.
+
+    Known extensions are classified without touching the file contents;
+    libmagic sniffing is only the fallback for unrecognized suffixes.
+    """
     suffix = file_path.suffix.lower()
-    
+
+    if suffix in config.VALID_VIDEO_EXTENSIONS:
+        season, episode = parse_tv(filename)
+        if season is not None:
+            return 'tv_show', season, episode
+        return 'movie', None, None
+    elif suffix in config.VALID_AUDIOBOOK_EXTENSIONS:
+        return 'audiobook', None, None
+    elif suffix in config.VALID_AUDIO_EXTENSIONS:
+        return 'music', None, None
+    elif suffix in config.VALID_BOOK_EXTENSIONS:
+        return 'book', None, None
+    elif suffix in config.VALID_SOFTWARE_EXTENSIONS:
+        return 'software', None, None
+
+    # Unknown extension - fall back to sniffing the file contents
+    file_type = get_file_type(file_path)
+
     if file_type == 'video':
-        return 'tv_show' if is_tv_show(filename) else 'movie'
+        season, episode = parse_tv(filename)
+        if season is not None:
+            return 'tv_show', season, episode
+        return 'movie', None, None
     elif file_type == 'audio':
-        # Check if it's an audiobook
-        if suffix in config.VALID_AUDIOBOOK_EXTENSIONS:
-            return 'audiobook'
-        return 'music'
-    elif suffix in config.VALID_BOOK_EXTENSIONS:
-        return 'book'
+        return 'music', None, None
     elif file_type == 'software':
-        return 'software'
-    return 'unknown'
+        return 'software', None, None
+    return 'unknown', None, None